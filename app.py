@@ -4,17 +4,24 @@ from sqlalchemy.pool import NullPool
 
 import os
 import csv
+import gzip
+import hashlib
 import io
+import json
 import math
+import re
+import secrets
 import time
 import requests
-from functools import wraps
-from datetime import datetime, timezone
-from flask import Flask, request, jsonify, render_template, session, redirect, url_for, send_file, send_from_directory
+from collections import OrderedDict, deque
+from functools import lru_cache, wraps
+from datetime import datetime, timedelta, timezone
+from flask import Flask, Response, has_request_context, request, jsonify, render_template, session, redirect, url_for, send_file, send_from_directory, stream_with_context
 from flask_socketio import SocketIO, emit
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, create_engine, event, text
+from sqlalchemy.exc import SQLAlchemyError
 
 # -------------------------------------------------
 # APP SETUP
@@ -31,6 +38,36 @@ if not os.environ.get('DATABASE_URL'):
 
 IS_SQLITE = "sqlite" in DATABASE_URL
 
+# Opt-in: raw rows older than this are folded into signal_hourly and deleted.
+# Stats, buildings and coverage read both tables; the leaderboard, samples and
+# export only see retained raw rows. 0 (default) disables.
+# Never goes below 7 days so /api/signal-history keeps reading raw rows.
+RETENTION_DAYS = int(os.environ.get('RETENTION_DAYS', 0))
+if RETENTION_DAYS:
+    RETENTION_DAYS = max(RETENTION_DAYS, 7)
+RETENTION_INTERVAL_S = int(os.environ.get('RETENTION_INTERVAL_S', 3600))
+DELETE_BATCH_SIZE = int(os.environ.get('DELETE_BATCH_SIZE', 500))
+BATCH_PAUSE_S = float(os.environ.get('BATCH_PAUSE_S', 0.05))
+
+# Submissions from the same contributor this close in space and time are duplicates.
+# DEDUP_MODE is 'reject' (drop the new point) or 'merge' (fill gaps in the earlier row).
+DEDUP_DISTANCE_M = float(os.environ.get('DEDUP_DISTANCE_M', 10))
+DEDUP_WINDOW_S = float(os.environ.get('DEDUP_WINDOW_S', 10))
+DEDUP_MODE = os.environ.get('DEDUP_MODE', 'reject')
+DEDUP_MAX_KEYS = int(os.environ.get('DEDUP_MAX_KEYS', 20000))
+IDEMPOTENCY_TTL_S = int(os.environ.get('IDEMPOTENCY_TTL_S', 86400))
+
+# Upper bound on the sample set bundled into /api/bootstrap
+BOOTSTRAP_SAMPLE_LIMIT = int(os.environ.get('BOOTSTRAP_SAMPLE_LIMIT', 5000))
+
+# Rows per transaction for /admin/import
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+
+# Statements slower than this land in the /admin slow-query log; EXPLAIN capture is opt-in
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', 200))
+SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', '0') == '1'
+
 if IS_SQLITE:
     engine = create_engine(DATABASE_URL, poolclass=NullPool)
 else:
@@ -41,6 +78,98 @@ else:
         connect_args={"sslmode": "require"}
     )
 
+# -------------------------------------------------
+# SLOW-QUERY LOG
+# -------------------------------------------------
+
+SLOW_QUERIES: deque = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+# normalized SQL -> plan, least recently planned first; a hot slow query is EXPLAINed once, not per hit
+_SLOW_QUERY_PLANS: OrderedDict = OrderedDict()
+
+# Expanded IN-lists like (?, ?, ?) or (%(ids_1)s, %(ids_2)s) collapse to (...)
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s)(?:\s*,\s*(?:\?|%\(\w+\)s))+\s*\)")
+
+
+def _normalize_sql(statement):
+    return _PLACEHOLDER_LIST.sub("(...)", " ".join(statement.split()))
+
+
+def _explain(statement, parameters):
+    """Plan a SELECT on its own connection, so a failing EXPLAIN can't abort the caller's transaction."""
+    prefix = "EXPLAIN QUERY PLAN " if IS_SQLITE else "EXPLAIN "
+    try:
+        with engine.connect() as plan_conn:
+            rows = plan_conn.execute(text(prefix + statement), parameters).fetchall()
+        return "\n".join(str(row[-1]) for row in rows)
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+
+
+def _record_slow_query(statement, parameters, duration_ms, executemany=False):
+    if has_request_context():
+        route = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+    else:
+        route = "background"
+    if executemany:
+        params = f"{len(parameters)} rows, first: {parameters[0]!r}" if parameters else "[]"
+    else:
+        params = repr(parameters)
+
+    sql = _normalize_sql(statement)
+    plan = None
+    # EXPLAIN never runs the statement, but executemany has no single parameter set to plan with
+    if SLOW_QUERY_EXPLAIN and not executemany and statement.lstrip().upper().startswith("SELECT"):
+        plan = _SLOW_QUERY_PLANS.get(sql)
+        if plan is None:
+            plan = _explain(statement, parameters)
+            _SLOW_QUERY_PLANS[sql] = plan
+            while len(_SLOW_QUERY_PLANS) > SLOW_QUERY_LOG_SIZE:
+                _SLOW_QUERY_PLANS.popitem(last=False)
+
+    SLOW_QUERIES.append({
+        "at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(duration_ms, 1),
+        "route": route,
+        "sql": sql,
+        "params": params[:500],
+        "plan": plan,
+    })
+
+
+def _query(conn, sql, params=None):
+    """Execute a row-returning statement and fetch all rows, timing both for the slow-query log.
+
+    sqlite3 does most of a SELECT's work while rows are fetched, so the cursor
+    events below would only see the time to the first row.
+    """
+    started = time.perf_counter()
+    rows = conn.execute(sql, params or {}).fetchall()
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms >= SLOW_QUERY_MS:
+        _record_slow_query(str(sql), params or {}, duration_ms)
+    return rows
+
+
+# Statements without result rows (INSERT/UPDATE/DELETE/DDL) finish inside execute,
+# so they are timed per cursor execute; row-returning ones go through _query.
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "handle_error")
+def _on_cursor_error(context):
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+    if duration_ms >= SLOW_QUERY_MS and cursor.description is None:
+        _record_slow_query(statement, parameters, duration_ms, executemany)
+
 # -------------------------------------------------
 # BUILDINGS — VIT Chennai Campus
 # -------------------------------------------------
@@ -91,10 +220,56 @@ def ensure_tables_exist():
         );
         """
 
+    # Compacted per-cell, per-hour aggregates of rows past the retention window
+    if IS_SQLITE:
+        hourly_sql = """
+        CREATE TABLE IF NOT EXISTS signal_hourly (
+            cell_lat INTEGER NOT NULL,
+            cell_lng INTEGER NOT NULL,
+            bucket TEXT NOT NULL,
+            carrier TEXT NOT NULL,
+            network_type TEXT NOT NULL,
+            samples INTEGER NOT NULL DEFAULT 0,
+            lat_sum REAL NOT NULL DEFAULT 0,
+            lng_sum REAL NOT NULL DEFAULT 0,
+            signal_sum REAL NOT NULL DEFAULT 0,
+            signal_count INTEGER NOT NULL DEFAULT 0,
+            speed_sum REAL NOT NULL DEFAULT 0,
+            speed_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (cell_lat, cell_lng, bucket, carrier, network_type)
+        );
+        """
+    else:
+        hourly_sql = """
+        CREATE TABLE IF NOT EXISTS signal_hourly (
+            cell_lat INTEGER NOT NULL,
+            cell_lng INTEGER NOT NULL,
+            bucket TEXT NOT NULL,
+            carrier TEXT NOT NULL,
+            network_type TEXT NOT NULL,
+            samples INTEGER NOT NULL DEFAULT 0,
+            lat_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            lng_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            signal_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            signal_count INTEGER NOT NULL DEFAULT 0,
+            speed_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            speed_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (cell_lat, cell_lng, bucket, carrier, network_type)
+        );
+        """
+
     for attempt in range(1, 4):
         try:
             with engine.begin() as conn:
                 conn.execute(text(create_sql))
+                conn.execute(text(hourly_sql))
+                # Bumped by every write so the bootstrap ETag can skip COUNT(*)
+                conn.execute(text("CREATE TABLE IF NOT EXISTS signal_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"))
+                conn.execute(text("INSERT INTO signal_meta (key, value) VALUES ('changes', 0) ON CONFLICT (key) DO NOTHING"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS idx_signal_data_created_at ON signal_data (created_at)"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS idx_signal_data_contributor ON signal_data (contributor_id)"))
+            # Separate transaction: on Postgres a failed ALTER aborts the whole block
+            with engine.begin() as conn:
                 try:
                     conn.execute(text("ALTER TABLE signal_data ADD COLUMN display_name TEXT DEFAULT NULL"))
                 except Exception:
@@ -109,6 +284,15 @@ def ensure_tables_exist():
 
 ensure_tables_exist()
 
+
+def _bump_data_version(conn):
+    """Call inside every transaction that writes signal_data (insert, update or delete).
+
+    The UPDATE row-locks signal_meta until commit, so the counter moves in commit order
+    (unlike SERIAL ids, which can commit out of order).
+    """
+    conn.execute(text("UPDATE signal_meta SET value = value + 1 WHERE key = 'changes'"))
+
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet")
 limiter = Limiter(get_remote_address, app=app, default_limits=["50000 per day", "5000 per hour"])
 
@@ -128,6 +312,15 @@ _VIT_LNG_MAX = max(p[1] for p in VIT_POLYGON)
 _VIT_CENTER_LAT = (_VIT_LAT_MIN + _VIT_LAT_MAX) / 2
 _VIT_CENTER_LNG = (_VIT_LNG_MIN + _VIT_LNG_MAX) / 2
 
+# 30m grid shared by coverage and compaction
+GRID_M = 30
+_GRID_LAT_DEG = GRID_M / 111_000
+_GRID_LNG_DEG = GRID_M / (111_000 * math.cos(math.radians(_VIT_CENTER_LAT)))
+
+
+def _grid_cell(lat, lng):
+    return int(lat / _GRID_LAT_DEG), int(lng / _GRID_LNG_DEG)
+
 
 def _haversine_km(lat1, lng1, lat2, lng2):
     R = 6371.0
@@ -217,6 +410,219 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated
 
+# -------------------------------------------------
+# INGESTION DEDUPLICATION
+# -------------------------------------------------
+
+# (contributor_id, cell_lat, cell_lng) -> (last_arrival, [(captured_at, lat, lng, row_id), ...]),
+# least recently touched first
+_recent_points: OrderedDict = OrderedDict()
+# (contributor_id, idempotency_key) -> arrival ts, oldest first
+_idempotency_keys: OrderedDict = OrderedDict()
+DEDUP_COUNTERS = {"dropped": 0, "merged": 0, "replayed": 0}
+
+# Cells are GRID_M wide, so the 3x3 neighbourhood search covers radii up to GRID_M
+_DEDUP_RADIUS_M = min(DEDUP_DISTANCE_M, GRID_M)
+_DEDUP_MAX_PER_CELL = 32
+
+
+def _capture_time(raw, now):
+    """Client capture time (epoch ms, as sent by upload.js) in seconds; arrival time if missing or implausible."""
+    try:
+        ts = float(raw) / 1000
+    except (TypeError, ValueError):
+        return now
+    return ts if now - 7 * 86400 <= ts <= now + 300 else now
+
+
+def _prune_dedup(now):
+    # Expiry is by arrival, so an offline queue replayed back to back stays comparable
+    while _recent_points:
+        key, (touched, _) = next(iter(_recent_points.items()))
+        if len(_recent_points) <= DEDUP_MAX_KEYS and now - touched <= DEDUP_WINDOW_S:
+            break
+        _recent_points.popitem(last=False)
+    while _idempotency_keys:
+        key, ts = next(iter(_idempotency_keys.items()))
+        if len(_idempotency_keys) <= DEDUP_MAX_KEYS and now - ts <= IDEMPOTENCY_TTL_S:
+            break
+        _idempotency_keys.popitem(last=False)
+
+
+def _find_duplicate(contributor_id, lat, lng, captured_at):
+    """Return the row id of a point from `contributor_id` captured within the dedup window, else None."""
+    cell_lat, cell_lng = _grid_cell(lat, lng)
+    for dlat in (-1, 0, 1):
+        for dlng in (-1, 0, 1):
+            _, entries = _recent_points.get((contributor_id, cell_lat + dlat, cell_lng + dlng), (None, ()))
+            for ts, p_lat, p_lng, row_id in entries:
+                if abs(captured_at - ts) <= DEDUP_WINDOW_S and _haversine_m(lat, lng, p_lat, p_lng) <= _DEDUP_RADIUS_M:
+                    return row_id
+    return None
+
+
+def _remember_point(contributor_id, lat, lng, row_id, captured_at, now):
+    key = (contributor_id, *_grid_cell(lat, lng))
+    _, entries = _recent_points.get(key, (None, []))
+    entries = (entries + [(captured_at, lat, lng, row_id)])[-_DEDUP_MAX_PER_CELL:]
+    _recent_points[key] = (now, entries)
+    _recent_points.move_to_end(key)
+
+# -------------------------------------------------
+# RETENTION, COMPACTION & BATCHED DELETES
+# -------------------------------------------------
+
+def _db_time(dt):
+    """Render a datetime the way created_at is stored (SQLite keeps UTC text)."""
+    dt = dt.astimezone(timezone.utc) if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    return dt.strftime("%Y-%m-%d %H:%M:%S") if IS_SQLITE else dt
+
+
+def _hour_bucket(value):
+    if hasattr(value, "astimezone"):
+        value = value.astimezone(timezone.utc) if value.tzinfo else value
+        return value.strftime("%Y-%m-%dT%H:00:00")
+    return str(value)[:13].replace(" ", "T") + ":00:00"
+
+
+def _delete_in_batches(where="", params=None, job=None):
+    """Delete matching signal_data rows DELETE_BATCH_SIZE at a time, yielding between chunks.
+
+    Progress is written to `job["deleted"]` when a job record is passed.
+    """
+    params = dict(params or {}, batch=DELETE_BATCH_SIZE)
+    sql = text(f"DELETE FROM signal_data WHERE id IN (SELECT id FROM signal_data {where} LIMIT :batch)")
+    deleted = 0
+    while True:
+        with engine.begin() as conn:
+            count = conn.execute(sql, params).rowcount
+            if count:
+                _bump_data_version(conn)
+        deleted += count
+        if job is not None:
+            job["deleted"] = deleted
+        if count < DELETE_BATCH_SIZE:
+            return deleted
+        socketio.sleep(BATCH_PAUSE_S)
+
+
+_HOURLY_UPSERT = text("""
+    INSERT INTO signal_hourly (cell_lat, cell_lng, bucket, carrier, network_type, samples,
+                               lat_sum, lng_sum, signal_sum, signal_count, speed_sum, speed_count)
+    VALUES (:cell_lat, :cell_lng, :bucket, :carrier, :network_type, :samples,
+            :lat_sum, :lng_sum, :signal_sum, :signal_count, :speed_sum, :speed_count)
+    ON CONFLICT (cell_lat, cell_lng, bucket, carrier, network_type) DO UPDATE SET
+        samples      = signal_hourly.samples      + excluded.samples,
+        lat_sum      = signal_hourly.lat_sum      + excluded.lat_sum,
+        lng_sum      = signal_hourly.lng_sum      + excluded.lng_sum,
+        signal_sum   = signal_hourly.signal_sum   + excluded.signal_sum,
+        signal_count = signal_hourly.signal_count + excluded.signal_count,
+        speed_sum    = signal_hourly.speed_sum    + excluded.speed_sum,
+        speed_count  = signal_hourly.speed_count  + excluded.speed_count
+""")
+
+_DELETE_IDS = text("DELETE FROM signal_data WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+
+
+def compact_old_samples(days=None):
+    """Fold raw rows older than `days` into signal_hourly, then delete them in batches."""
+    days = RETENTION_DAYS if days is None else days
+    if not days:
+        return 0
+    cutoff = _db_time(datetime.now(timezone.utc) - timedelta(days=days))
+    # SKIP LOCKED keeps two workers from compacting the same chunk twice
+    lock = "" if IS_SQLITE else "FOR UPDATE SKIP LOCKED"
+    select_sql = text(f"""
+        SELECT id, lat, lng, carrier, network_type, signal_strength, download_speed, created_at
+        FROM signal_data WHERE created_at < :cutoff ORDER BY id LIMIT :batch {lock}
+    """)
+
+    compacted = 0
+    while True:
+        with engine.begin() as conn:
+            rows = _query(conn, select_sql, {"cutoff": cutoff, "batch": DELETE_BATCH_SIZE})
+            if not rows:
+                return compacted
+
+            cells = {}
+            for r in rows:
+                cell_lat, cell_lng = _grid_cell(r.lat, r.lng)
+                key = (cell_lat, cell_lng, _hour_bucket(r.created_at), r.carrier, r.network_type)
+                agg = cells.setdefault(key, {
+                    "cell_lat": cell_lat, "cell_lng": cell_lng, "bucket": key[2],
+                    "carrier": r.carrier, "network_type": r.network_type, "samples": 0,
+                    "lat_sum": 0.0, "lng_sum": 0.0, "signal_sum": 0.0, "signal_count": 0,
+                    "speed_sum": 0.0, "speed_count": 0,
+                })
+                agg["samples"] += 1
+                agg["lat_sum"] += r.lat
+                agg["lng_sum"] += r.lng
+                if r.signal_strength is not None:
+                    agg["signal_sum"] += r.signal_strength
+                    agg["signal_count"] += 1
+                if r.download_speed is not None:
+                    agg["speed_sum"] += r.download_speed
+                    agg["speed_count"] += 1
+
+            conn.execute(_HOURLY_UPSERT, list(cells.values()))
+            conn.execute(_DELETE_IDS, {"ids": [r.id for r in rows]})
+            _bump_data_version(conn)
+
+        compacted += len(rows)
+        if len(rows) < DELETE_BATCH_SIZE:
+            return compacted
+        socketio.sleep(BATCH_PAUSE_S)
+
+
+def _retention_loop():
+    while True:
+        try:
+            compacted = compact_old_samples()
+            if compacted:
+                print(f"🧹 Compacted {compacted} samples older than {RETENTION_DAYS} days")
+        except Exception as e:
+            print(f"⚠️ Retention run failed: {e}")
+        socketio.sleep(RETENTION_INTERVAL_S)
+
+
+if RETENTION_DAYS:
+    socketio.start_background_task(_retention_loop)
+
+
+# job_id -> {status, deleted, ...} for admin deletes, oldest first
+DELETE_JOBS: OrderedDict = OrderedDict()
+_DELETE_JOBS_KEPT = 50
+
+
+def _run_delete_job(job, where, params):
+    try:
+        _delete_in_batches(where, params, job)
+        job["status"] = "done"
+        print(f"🗑️ Deleted {job['deleted']} samples ({job['description']})")
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+        print(f"⚠️ Delete job {job['id']} failed after {job['deleted']} rows: {e}")
+    job["finished_at"] = datetime.now(timezone.utc).isoformat()
+
+
+def _start_delete_job(description, where="", params=None):
+    """Run _delete_in_batches as a background task so large deletes outlive the HTTP request."""
+    job = {
+        "id": secrets.token_hex(6),
+        "description": description,
+        "status": "running",
+        "deleted": 0,
+        "error": None,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "finished_at": None,
+    }
+    DELETE_JOBS[job["id"]] = job
+    while len(DELETE_JOBS) > _DELETE_JOBS_KEPT:
+        DELETE_JOBS.popitem(last=False)
+    socketio.start_background_task(_run_delete_job, job, where, params)
+    return job
+
 # -------------------------------------------------
 # ROUTES — Pages
 # -------------------------------------------------
@@ -281,7 +687,7 @@ def admin_dashboard():
 @admin_required
 def admin_export():
     with engine.connect() as conn:
-        rows = conn.execute(text("SELECT * FROM signal_data ORDER BY created_at DESC"))
+        rows = _query(conn, text("SELECT * FROM signal_data ORDER BY created_at DESC"))
         data = [dict(r._mapping) for r in rows]
     output = io.StringIO()
     writer = csv.DictWriter(output, fieldnames=["id", "lat", "lng", "carrier", "network_type", "signal_strength", "download_speed", "contributor_id", "display_name", "created_at"])
@@ -298,12 +704,127 @@ def admin_export():
     )
 
 
+_IMPORT_INSERT = text(
+    "INSERT INTO signal_data (lat, lng, carrier, network_type, signal_strength, download_speed, contributor_id, display_name, created_at) "
+    "VALUES (:lat, :lng, :carrier, :network_type, :signal_strength, :download_speed, :contributor_id, :display_name, :created_at)"
+)
+
+
+def _clean_import_row(row, now):
+    """Validate one CSV row in /admin/export format. Returns (payload, None) or (None, reason)."""
+    try:
+        lat, lng = float(row["lat"]), float(row["lng"])
+    except (KeyError, TypeError, ValueError):
+        return None, "Invalid coordinates"
+    valid, reason = is_within_bounds(lat, lng)
+    if not valid:
+        return None, reason
+
+    created_at = now
+    if row.get("created_at"):
+        try:
+            created_at = _db_time(datetime.fromisoformat(row["created_at"]))
+        except ValueError:
+            return None, "Invalid created_at"
+
+    network_type = (row.get("network_type") or "").upper()
+    return {
+        "lat": lat,
+        "lng": lng,
+        "carrier": row.get("carrier") if row.get("carrier") in VALID_CARRIERS else "Other",
+        "network_type": network_type if network_type in VALID_NETWORKS else "Unknown",
+        "signal_strength": _clean_signal(row.get("signal_strength")),
+        "download_speed": _clean_speed(row.get("download_speed")),
+        "contributor_id": _clean_contributor_id(row.get("contributor_id")),
+        "display_name": (row.get("display_name") or "")[:30].strip() or None,
+        "created_at": created_at,
+    }, None
+
+
+@app.route("/admin/import", methods=["POST"])
+@admin_required
+def admin_import():
+    """Stream a CSV (optionally gzipped) in /admin/export format into signal_data.
+
+    Accepts a multipart `file` field or a raw request body, and answers with
+    NDJSON progress lines followed by a summary line.
+    """
+    upload = request.files.get("file")
+    if upload:
+        stream, name, mimetype = upload.stream, upload.filename or "", upload.mimetype
+    else:
+        stream, name, mimetype = request.stream, request.args.get("filename", ""), request.mimetype
+    if name.endswith(".gz") or mimetype in ("application/gzip", "application/x-gzip") or request.args.get("gzip") == "1":
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    try:
+        columns = set(reader.fieldnames or ())
+    except (OSError, UnicodeDecodeError) as e:
+        return jsonify({"error": f"Unreadable file: {e}"}), 400
+    if not {"lat", "lng"} <= columns:
+        return jsonify({"error": "CSV must have at least lat and lng columns"}), 400
+
+    def generate():
+        started = time.monotonic()
+        now = _db_time(datetime.now(timezone.utc))
+        processed = inserted = rejected = 0
+        reject_counts = {}
+        rejects = []
+        batch = []
+
+        def progress(**extra):
+            elapsed = time.monotonic() - started
+            return json.dumps({
+                "processed": processed,
+                "inserted": inserted,
+                "rejected": rejected,
+                "rows_per_sec": round(processed / elapsed, 1) if elapsed else None,
+                **extra,
+            }) + "\n"
+
+        try:
+            for row in reader:
+                processed += 1
+                payload, reason = _clean_import_row(row, now)
+                if payload is None:
+                    rejected += 1
+                    reject_counts[reason] = reject_counts.get(reason, 0) + 1
+                    if len(rejects) < 100:
+                        rejects.append({"line": reader.line_num, "reason": reason})
+                    continue
+                batch.append(payload)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    with engine.begin() as conn:
+                        conn.execute(_IMPORT_INSERT, batch)
+                        _bump_data_version(conn)
+                    inserted += len(batch)
+                    batch = []
+                    yield progress()
+            if batch:
+                with engine.begin() as conn:
+                    conn.execute(_IMPORT_INSERT, batch)
+                    _bump_data_version(conn)
+                inserted += len(batch)
+                batch = []
+        except (OSError, UnicodeDecodeError, csv.Error, SQLAlchemyError) as e:
+            # Valid rows still in the batch were never committed; they're neither inserted nor rejected
+            # DBAPI error only; str(SQLAlchemyError) would echo the whole batch's parameters
+            yield progress(done=True, error=f"Import stopped at line {reader.line_num}: {getattr(e, 'orig', None) or e}",
+                           not_imported=len(batch), reject_reasons=reject_counts, rejects=rejects)
+            return
+        yield progress(done=True, reject_reasons=reject_counts, rejects=rejects)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 @app.route("/api/admin/recent")
 @admin_required
 def admin_recent():
     limit = min(int(request.args.get("limit", 100)), 1000)
     with engine.connect() as conn:
-        rows = conn.execute(
+        rows = _query(
+            conn,
             text("SELECT * FROM signal_data ORDER BY created_at DESC LIMIT :limit"),
             {"limit": limit}
         )
@@ -314,23 +835,89 @@ def admin_recent():
     return jsonify(data)
 
 
+@app.route("/api/admin/slow-queries")
+@admin_required
+def admin_slow_queries():
+    return jsonify({
+        "threshold_ms": SLOW_QUERY_MS,
+        "explain": SLOW_QUERY_EXPLAIN,
+        "queries": list(reversed(SLOW_QUERIES)),
+    })
+
+
+@app.route("/api/admin/dedup-stats")
+@admin_required
+def admin_dedup_stats():
+    return jsonify({
+        **DEDUP_COUNTERS,
+        "tracked_cells": len(_recent_points),
+        "tracked_keys": len(_idempotency_keys),
+        "mode": DEDUP_MODE,
+        "distance_m": _DEDUP_RADIUS_M,
+        "window_s": DEDUP_WINDOW_S,
+    })
+
+
 @app.route("/admin/delete/<int:row_id>", methods=["POST"])
 @admin_required
 def admin_delete_row(row_id):
     with engine.begin() as conn:
         conn.execute(text("DELETE FROM signal_data WHERE id = :id"), {"id": row_id})
+        _bump_data_version(conn)
     return jsonify({"success": True})
 
 
+@app.route("/admin/delete-bulk", methods=["POST"])
+@admin_required
+def admin_delete_bulk():
+    """Batched delete filtered by contributor, time range (ISO 8601) and/or bbox [south, west, north, east]."""
+    data = request.get_json(silent=True) or {}
+    filters = []
+    params = {}
+    try:
+        if data.get("contributor_id"):
+            # _clean_contributor_id falls back to 'anon'; never let a typo widen the delete to all anonymous rows
+            raw_id = str(data["contributor_id"]).strip().lower()
+            if _clean_contributor_id(raw_id) != raw_id:
+                raise ValueError(f"invalid contributor_id {data['contributor_id']!r}")
+            filters.append("contributor_id = :contributor_id")
+            params["contributor_id"] = raw_id
+        if data.get("since"):
+            filters.append("created_at >= :since")
+            params["since"] = _db_time(datetime.fromisoformat(data["since"]))
+        if data.get("until"):
+            filters.append("created_at < :until")
+            params["until"] = _db_time(datetime.fromisoformat(data["until"]))
+        if data.get("bbox"):
+            south, west, north, east = (float(v) for v in data["bbox"])
+            filters.append("lat BETWEEN :south AND :north AND lng BETWEEN :west AND :east")
+            params.update(south=south, west=west, north=north, east=east)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+    if not filters:
+        return jsonify({"error": "At least one filter required"}), 400
+
+    job = _start_delete_job(f"filters {sorted(k for k in data if data[k])}", "WHERE " + " AND ".join(filters), params)
+    return jsonify({"success": True, "job": job}), 202
+
+
 @app.route("/admin/delete-all", methods=["POST"])
 @admin_required
 def admin_delete_all():
     data = request.get_json(silent=True) or {}
     if data.get("confirm") != "DELETE_ALL":
         return jsonify({"error": "Confirmation required"}), 400
-    with engine.begin() as conn:
-        conn.execute(text("DELETE FROM signal_data"))
-    return jsonify({"success": True})
+    job = _start_delete_job("all rows")
+    return jsonify({"success": True, "job": job}), 202
+
+
+@app.route("/api/admin/delete-jobs/<job_id>")
+@admin_required
+def admin_delete_job(job_id):
+    job = DELETE_JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job)
 
 # -------------------------------------------------
 # ROUTES — Public API
@@ -358,12 +945,47 @@ def submit_data():
             "contributor_id": _clean_contributor_id(data.get("contributor_id")),
             "display_name": str(data.get("display_name", "") or "")[:30].strip() or None,
         }
+
+        now = time.time()
+        _prune_dedup(now)
+        contributor_id = payload["contributor_id"]
+        captured_at = _capture_time(data.get("captured_at"), now)
+        idem_key = data.get("idempotency_key") or request.headers.get("Idempotency-Key")
+        idem_key = (contributor_id, str(idem_key)[:64]) if idem_key else None
+        if idem_key and idem_key in _idempotency_keys:
+            DEDUP_COUNTERS["replayed"] += 1
+            return jsonify({"success": True, "duplicate": True}), 200
+
+        # Anonymous senders can't be told apart (campus NAT shares IPs), so only idempotency keys apply
+        dup_id = _find_duplicate(contributor_id, lat, lng, captured_at) if contributor_id != "anon" else None
+        if dup_id is not None:
+            if DEDUP_MODE == "merge":
+                with engine.begin() as conn:
+                    conn.execute(
+                        text("UPDATE signal_data SET signal_strength = COALESCE(signal_strength, :signal_strength), "
+                            "download_speed = COALESCE(download_speed, :download_speed) WHERE id = :id"),
+                        {"id": dup_id, "signal_strength": payload["signal_strength"], "download_speed": payload["download_speed"]}
+                    )
+                    _bump_data_version(conn)
+                DEDUP_COUNTERS["merged"] += 1
+            else:
+                DEDUP_COUNTERS["dropped"] += 1
+            if idem_key:
+                _idempotency_keys[idem_key] = now
+            return jsonify({"success": True, "duplicate": True}), 200
+
         with engine.begin() as conn:
-            conn.execute(
+            row_id = _query(
+                conn,
                 text("INSERT INTO signal_data (lat, lng, carrier, network_type, signal_strength, download_speed, contributor_id, display_name) "
-                    "VALUES (:lat, :lng, :carrier, :network_type, :signal_strength, :download_speed, :contributor_id, :display_name)"),
+                    "VALUES (:lat, :lng, :carrier, :network_type, :signal_strength, :download_speed, :contributor_id, :display_name) RETURNING id"),
                 payload
-            )
+            )[0][0]
+            _bump_data_version(conn)
+        if contributor_id != "anon":
+            _remember_point(contributor_id, lat, lng, row_id, captured_at, now)
+        if idem_key:
+            _idempotency_keys[idem_key] = now
 
         socketio.emit("new_data_point", {k: v for k, v in payload.items() if k != "contributor_id"})
         return jsonify({"success": True}), 201
@@ -371,12 +993,7 @@ def submit_data():
         return jsonify({"error": str(e)}), 400
 
 
-@app.route("/api/samples")
-def get_samples():
-    carrier = request.args.get("carrier")
-    network_type = request.args.get("network_type")
-    limit = min(int(request.args.get("limit", 5000)), 10000)
-
+def _fetch_samples(carrier=None, network_type=None, limit=5000):
     filters = []
     params = {"limit": limit}
     if carrier:
@@ -390,35 +1007,64 @@ def get_samples():
     sql = f"SELECT lat, lng, signal_strength, download_speed, carrier, network_type, created_at FROM signal_data {where} ORDER BY created_at DESC LIMIT :limit"
 
     with engine.connect() as conn:
-        rows = conn.execute(text(sql), params)
+        rows = _query(conn, text(sql), params)
         results = [dict(r._mapping) for r in rows]
     for r in results:
         if hasattr(r.get("created_at"), "isoformat"):
             r["created_at"] = r["created_at"].isoformat()
-    return jsonify(results)
+    return results
 
 
-@app.route("/api/stats")
-def get_stats():
+def _fetch_stats():
+    """Totals over raw rows plus the compacted signal_hourly aggregates."""
     with engine.connect() as conn:
-        row = conn.execute(text("""
+        row = _query(conn, text("""
             SELECT
-                COUNT(*)                          AS total_samples,
-                ROUND(AVG(signal_strength), 1)    AS avg_signal_dbm,
-                ROUND(AVG(download_speed), 2)     AS avg_speed_mbps,
-                SUM(CASE WHEN network_type='5G' THEN 1 ELSE 0 END) AS five_g_count,
-                COUNT(DISTINCT carrier)            AS unique_carriers
-            FROM signal_data
-        """)).fetchone()
-    d = dict(row._mapping)
-    return jsonify(d)
+                raw.samples + arch.samples          AS total_samples,
+                raw.signal_sum + arch.signal_sum    AS signal_sum,
+                raw.signal_count + arch.signal_count AS signal_count,
+                raw.speed_sum + arch.speed_sum      AS speed_sum,
+                raw.speed_count + arch.speed_count  AS speed_count,
+                raw.five_g + arch.five_g            AS five_g_count,
+                (SELECT COUNT(DISTINCT carrier) FROM (
+                    SELECT carrier FROM signal_data UNION SELECT carrier FROM signal_hourly
+                ) carriers)                         AS unique_carriers,
+                arch.samples                        AS archived_samples
+            FROM (
+                SELECT
+                    COUNT(*)                            AS samples,
+                    COALESCE(SUM(signal_strength), 0)   AS signal_sum,
+                    COUNT(signal_strength)              AS signal_count,
+                    COALESCE(SUM(download_speed), 0)    AS speed_sum,
+                    COUNT(download_speed)               AS speed_count,
+                    COALESCE(SUM(CASE WHEN network_type='5G' THEN 1 ELSE 0 END), 0) AS five_g
+                FROM signal_data
+            ) raw, (
+                SELECT
+                    COALESCE(SUM(samples), 0)           AS samples,
+                    COALESCE(SUM(signal_sum), 0)        AS signal_sum,
+                    COALESCE(SUM(signal_count), 0)      AS signal_count,
+                    COALESCE(SUM(speed_sum), 0)         AS speed_sum,
+                    COALESCE(SUM(speed_count), 0)       AS speed_count,
+                    COALESCE(SUM(CASE WHEN network_type='5G' THEN samples ELSE 0 END), 0) AS five_g
+                FROM signal_hourly
+            ) arch
+        """))[0]
+    d = row._mapping
+    return {
+        "total_samples":   d["total_samples"],
+        "avg_signal_dbm":  round(d["signal_sum"] / d["signal_count"], 1) if d["signal_count"] else None,
+        "avg_speed_mbps":  round(d["speed_sum"] / d["speed_count"], 2) if d["speed_count"] else None,
+        "five_g_count":    d["five_g_count"],
+        "unique_carriers": d["unique_carriers"],
+        "archived_samples": d["archived_samples"],
+    }
 
 
-@app.route("/api/leaderboard")
-def get_leaderboard():
-    limit = min(int(request.args.get("limit", 20)), 100)
+def _fetch_leaderboard(limit=20):
+    """Ranks contributors by retained raw rows; compaction drops contributor_id."""
     with engine.connect() as conn:
-        rows = conn.execute(text("""
+        rows = _query(conn, text("""
             SELECT
                 contributor_id,
                 MAX(display_name)                  AS display_name,
@@ -448,14 +1094,15 @@ def get_leaderboard():
             "avg_speed": entry["avg_speed"],
             "last_active": entry["last_active"],
         })
-    return jsonify(result)
+    return result
 
 
-@app.route("/api/buildings")
-def get_buildings():
-    carrier = request.args.get("carrier")
-    network_type = request.args.get("network_type")
+def _fetch_points(carrier=None, network_type=None):
+    """Raw rows plus compacted cells, for the in-Python building and coverage aggregations.
 
+    Every point carries sample/signal/speed sums and counts so both kinds weigh correctly;
+    compacted cells sit at their centroid and keep their grid cell key.
+    """
     filters = []
     params = {}
     if carrier:
@@ -466,24 +1113,35 @@ def get_buildings():
         params["network_type"] = network_type
     where = ("WHERE " + " AND ".join(filters)) if filters else ""
 
-    sql = f"SELECT lat, lng, signal_strength, download_speed FROM signal_data {where}"
+    sql = f"""
+        SELECT lat, lng, carrier, NULL AS cell_lat, NULL AS cell_lng, 1 AS samples,
+               COALESCE(signal_strength, 0) AS signal_sum, CASE WHEN signal_strength IS NULL THEN 0 ELSE 1 END AS signal_count,
+               COALESCE(download_speed, 0)  AS speed_sum,  CASE WHEN download_speed  IS NULL THEN 0 ELSE 1 END AS speed_count
+        FROM signal_data {where}
+        UNION ALL
+        SELECT lat_sum / samples, lng_sum / samples, carrier, cell_lat, cell_lng, samples,
+               signal_sum, signal_count, speed_sum, speed_count
+        FROM signal_hourly {where}
+    """
 
     with engine.connect() as conn:
-        rows = conn.execute(text(sql), params)
-        all_points = [dict(r._mapping) for r in rows]
+        rows = _query(conn, text(sql), params)
+        return [dict(r._mapping) for r in rows]
 
+
+def _building_summaries(all_points):
     results = []
     for bld in VIT_BUILDINGS:
         nearby = [
             p for p in all_points
             if _haversine_m(p["lat"], p["lng"], bld["lat"], bld["lng"]) <= bld["radius_m"]
         ]
-        samples = len(nearby)
-        signals = [p["signal_strength"] for p in nearby if p["signal_strength"] is not None]
-        speeds  = [p["download_speed"]  for p in nearby if p["download_speed"]  is not None]
+        samples      = sum(p["samples"] for p in nearby)
+        signal_count = sum(p["signal_count"] for p in nearby)
+        speed_count  = sum(p["speed_count"]  for p in nearby)
 
-        avg_signal = round(sum(signals) / len(signals), 1) if signals else None
-        avg_speed  = round(sum(speeds)  / len(speeds),  2) if speeds  else None
+        avg_signal = round(sum(p["signal_sum"] for p in nearby) / signal_count, 1) if signal_count else None
+        avg_speed  = round(sum(p["speed_sum"]  for p in nearby) / speed_count,  2) if speed_count  else None
         _, quality = _signal_quality(avg_signal)
 
         results.append({
@@ -497,43 +1155,36 @@ def get_buildings():
             "avg_speed":  avg_speed,
             "quality":    quality,
         })
+    return results
 
-    return jsonify(results)
 
+@lru_cache(maxsize=1)
+def _campus_cell_count():
+    """Number of 30m grid cells inside the campus polygon (fixed, so computed once)."""
+    total_campus_cells = 0
+    lat = _VIT_LAT_MIN
+    while lat <= _VIT_LAT_MAX:
+        lng = _VIT_LNG_MIN
+        while lng <= _VIT_LNG_MAX:
+            if _ray_cast_inside(lat, lng, VIT_POLYGON):
+                total_campus_cells += 1
+            lng += _GRID_LNG_DEG
+        lat += _GRID_LAT_DEG
+    return max(total_campus_cells, 1)
 
-@app.route("/api/coverage")
-def get_coverage():
-    """Compute % of 30m grid cells within campus that have at least one reading."""
-    with engine.connect() as conn:
-        rows = conn.execute(text("SELECT lat, lng, carrier FROM signal_data"))
-        all_points = [dict(r._mapping) for r in rows]
 
+def _coverage_summary(all_points):
     # Build a set of occupied 30m grid cells
-    GRID_M = 30
-    LAT_DEG = GRID_M / 111_000
-    LNG_DEG = GRID_M / (111_000 * math.cos(math.radians(_VIT_CENTER_LAT)))
-
     occupied: set = set()
     carrier_cells: dict = {}
 
     for p in all_points:
-        cell = (int(p["lat"] / LAT_DEG), int(p["lng"] / LNG_DEG))
+        cell = (p["cell_lat"], p["cell_lng"]) if p["cell_lat"] is not None else _grid_cell(p["lat"], p["lng"])
         occupied.add(cell)
         c = p.get("carrier", "Unknown")
         carrier_cells.setdefault(c, set()).add(cell)
 
-    # Total campus cells
-    total_campus_cells = 0
-    lat = _VIT_LAT_MIN
-    while lat <= _VIT_LAT_MAX:
-        lng = _VIT_LNG_MIN
-        while lng <= _VIT_LNG_MAX:
-            if _ray_cast_inside(lat, lng, VIT_POLYGON):
-                total_campus_cells += 1
-            lng += LNG_DEG
-        lat += LAT_DEG
-
-    total_campus_cells = max(total_campus_cells, 1)
+    total_campus_cells = _campus_cell_count()
     overall_pct = round(len(occupied) / total_campus_cells * 100, 1)
     overall_pct = min(overall_pct, 100.0)
 
@@ -543,15 +1194,10 @@ def get_coverage():
         if carrier not in ("Unknown", "Other", "anon")
     }
 
-    return jsonify({"overall_pct": overall_pct, "by_carrier": by_carrier})
+    return {"overall_pct": overall_pct, "by_carrier": by_carrier}
 
 
-@app.route("/api/signal-history")
-def get_signal_history():
-    """Return bucketed signal/speed averages over the last 7 days."""
-    carrier = request.args.get("carrier")
-    network_type = request.args.get("network_type")
-
+def _fetch_signal_history(carrier=None, network_type=None):
     filters = []
     params = {}
     if carrier:
@@ -587,14 +1233,111 @@ def get_signal_history():
         """
 
     with engine.connect() as conn:
-        rows = conn.execute(text(sql), params)
+        rows = _query(conn, text(sql), params)
         data = [dict(r._mapping) for r in rows]
 
     for r in data:
         if hasattr(r.get("bucket"), "isoformat"):
             r["bucket"] = r["bucket"].isoformat()
+    return data
 
-    return jsonify(data)
+
+def _data_version():
+    """Cheap fingerprint of the dataset: the signal_meta write counter plus the current hour.
+
+    The hour is included so the rolling 7-day history window still expires cached copies.
+    """
+    with engine.connect() as conn:
+        row = _query(conn, text("SELECT value FROM signal_meta WHERE key = 'changes'"))[0]
+    hour = datetime.now(timezone.utc).strftime("%Y%m%d%H")
+    return f"{row[0]}-{hour}"
+
+
+@app.route("/api/samples")
+def get_samples():
+    limit = min(int(request.args.get("limit", 5000)), 10000)
+    return jsonify(_fetch_samples(request.args.get("carrier"), request.args.get("network_type"), limit))
+
+
+@app.route("/api/stats")
+def get_stats():
+    return jsonify(_fetch_stats())
+
+
+@app.route("/api/leaderboard")
+def get_leaderboard():
+    limit = min(int(request.args.get("limit", 20)), 100)
+    return jsonify(_fetch_leaderboard(limit))
+
+
+@app.route("/api/buildings")
+def get_buildings():
+    all_points = _fetch_points(request.args.get("carrier"), request.args.get("network_type"))
+    return jsonify(_building_summaries(all_points))
+
+
+@app.route("/api/coverage")
+def get_coverage():
+    """Compute % of 30m grid cells within campus that have at least one reading."""
+    return jsonify(_coverage_summary(_fetch_points()))
+
+
+@app.route("/api/signal-history")
+def get_signal_history():
+    """Return bucketed signal/speed averages over the last 7 days."""
+    return jsonify(_fetch_signal_history(request.args.get("carrier"), request.args.get("network_type")))
+
+
+BOOTSTRAP_SECTIONS = {"stats", "history", "samples", "buildings", "coverage", "leaderboard"}
+
+
+@app.route("/api/bootstrap")
+def get_bootstrap():
+    """Several page-load endpoints in one gzipped, ETag-revalidated response.
+
+    `include` picks sections (default stats,samples, what the map needs to paint);
+    history, buildings, coverage and leaderboard are only built when asked for.
+    """
+    carrier = request.args.get("carrier")
+    network_type = request.args.get("network_type")
+    try:
+        limit = max(1, min(int(request.args.get("limit", 2000)), BOOTSTRAP_SAMPLE_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    include = set(request.args.get("include", "stats,samples").split(",")) & BOOTSTRAP_SECTIONS
+
+    key = f"{_data_version()}|{carrier}|{network_type}|{limit}|{','.join(sorted(include))}"
+    etag = hashlib.sha1(key.encode()).hexdigest()[:20]
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        data = {}
+        if "stats" in include:
+            data["stats"] = _fetch_stats()
+        if "history" in include:
+            data["history"] = _fetch_signal_history(carrier, network_type)
+        if "samples" in include:
+            data["samples"] = _fetch_samples(carrier, network_type, limit)
+        if "leaderboard" in include:
+            data["leaderboard"] = _fetch_leaderboard()
+        if include & {"buildings", "coverage"}:
+            # Coverage is always unfiltered; reuse its scan for buildings when no filter is set
+            all_points = _fetch_points() if ("coverage" in include or not (carrier or network_type)) else None
+            if "coverage" in include:
+                data["coverage"] = _coverage_summary(all_points)
+            if "buildings" in include:
+                filtered = _fetch_points(carrier, network_type) if (carrier or network_type) else all_points
+                data["buildings"] = _building_summaries(filtered)
+        response = jsonify(data)
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            response.set_data(gzip.compress(response.get_data(), 6))
+            response.headers["Content-Encoding"] = "gzip"
+
+    # Weak ETag: the same data is served gzipped or identity
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
 
 
 @app.route("/api/speed-test-payload")
@@ -163,13 +163,16 @@ async function fetchStats() {
     try {
         const res = await fetch(`${API_BASE}/api/stats`);
         if (!res.ok) return;
-        const d = await res.json();
-        if (sampleCount) sampleCount.textContent = d.total_samples?.toLocaleString() ?? "—";
-        if (avgSignal)   avgSignal.textContent   = formatDbm(d.avg_signal_dbm);
-        if (avgSpeed)    avgSpeed.textContent     = formatMbps(d.avg_speed_mbps);
+        renderStats(await res.json());
     } catch { /* non-critical */ }
 }
 
+function renderStats(d) {
+    if (sampleCount) sampleCount.textContent = d.total_samples?.toLocaleString() ?? "—";
+    if (avgSignal)   avgSignal.textContent   = formatDbm(d.avg_signal_dbm);
+    if (avgSpeed)    avgSpeed.textContent     = formatMbps(d.avg_speed_mbps);
+}
+
 // ================== DATA ==================
 let _allPoints = [];
 
@@ -215,6 +218,31 @@ carrierSelect?.addEventListener("change", () => { fetchSamples(); fetchChart();
 networkSelect?.addEventListener("change", () => { fetchSamples(); fetchChart(); });
 heatmapDataSel?.addEventListener("change", () => renderHeatmap(_allPoints));
 
+// ================== BOOTSTRAP ==================
+// One request for samples and stats on page load; the service worker
+// caches it and revalidates with its ETag. The chart still loads lazily.
+async function fetchBootstrap() {
+    const qs = new URLSearchParams();
+    if (carrierSelect?.value) qs.set("carrier",      carrierSelect.value);
+    if (networkSelect?.value) qs.set("network_type", networkSelect.value);
+    qs.set("limit", isMobile ? "1000" : "5000");
+
+    try {
+        setStatus("loading", t("status.loading") || "Loading…");
+        const res = await fetch(`${API_BASE}/api/bootstrap?${qs}`);
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        const d = await res.json();
+        _allPoints = d.samples;
+        renderHeatmap(d.samples);
+        renderStats(d.stats);
+        setStatus("live", `Live · ${d.samples.length} pts`);
+    } catch (err) {
+        console.warn("fetchBootstrap, falling back:", err);
+        fetchSamples();
+        fetchStats();
+    }
+}
+
 // ================== SIGNAL HISTORY CHART ==================
 let _chartInstance = null;
 
@@ -594,6 +622,5 @@ downloadMapBtn?.addEventListener("click", async () => {
 // tries to draw — prevents "source height is 0" CanvasRenderingContext2D error.
 map.invalidateSize();
 
-fetchSamples();
-fetchStats();
+fetchBootstrap();
 setInterval(fetchStats, 30_000);
\ No newline at end of file
@@ -1,4 +1,5 @@
 const CACHE_NAME = "vit-signal-cache-v2"; // ← bumped from v1 to force fresh install
+const API_CACHE  = "vit-signal-api-v1";   // /api/bootstrap snapshot, revalidated by ETag
 
 // Everything needed to load the app offline
 const ASSETS_TO_CACHE = [
@@ -29,7 +30,7 @@ self.addEventListener("activate", (event) => {
     event.waitUntil(
         caches.keys().then((keys) => Promise.all(
             keys.map((key) => {
-                if (key !== CACHE_NAME) return caches.delete(key); // deletes v1
+                if (key !== CACHE_NAME && key !== API_CACHE) return caches.delete(key); // deletes v1
             })
         ))
     );
@@ -41,7 +42,13 @@ self.addEventListener("activate", (event) => {
 self.addEventListener("fetch", (event) => {
     const url = event.request.url;
 
-    // Never intercept API calls or WebSockets
+    // Bootstrap snapshot: revalidate the cached copy with its ETag, serve it offline
+    if (url.includes("/api/bootstrap")) {
+        event.respondWith(revalidateBootstrap(event.request));
+        return;
+    }
+
+    // Never intercept other API calls or WebSockets
     if (url.includes("/api/") || url.includes("/socket.io/")) return;
 
     // Network-first for HTML navigation (so updated templates are always seen)
@@ -59,4 +66,21 @@ self.addEventListener("fetch", (event) => {
             return fetch(event.request).catch(() => undefined);
         })
     );
-});
\ No newline at end of file
+});
+
+async function revalidateBootstrap(request) {
+    const cache  = await caches.open(API_CACHE);
+    const cached = await cache.match(request);
+    const headers = new Headers(request.headers);
+    const etag = cached?.headers.get("ETag");
+    if (etag) headers.set("If-None-Match", etag);
+
+    try {
+        const res = await fetch(request.url, { headers, cache: "no-store" });
+        if (res.status === 304 && cached) return cached;
+        if (res.ok) await cache.put(request, res.clone());
+        return res;
+    } catch {
+        return cached || Response.error();
+    }
+}
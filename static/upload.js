@@ -327,6 +327,10 @@ document.addEventListener("DOMContentLoaded", () => {
             download_speed:  downloadSpeed,
             contributor_id:  CONTRIBUTOR_ID,
             display_name: getDisplayName(),
+            // Measurement time, so queued samples replayed together aren't mistaken for duplicates
+            captured_at: Date.now(),
+            // Lets the server drop replays if a queued sample was already stored
+            idempotency_key: `${CONTRIBUTOR_ID}-${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`,
         };
 
         if (!navigator.onLine) {